@@ -1,37 +1,90 @@
+from contextlib import asynccontextmanager
 from typing import Any
+import asyncio
+import hashlib
 import inspect
+import os
 
 from fastapi import FastAPI, HTTPException, Query
-from markdown2 import markdown
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from fastapi.routing import APIRoute
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import HTMLResponse, JSONResponse, Response
 from starlette.templating import Jinja2Templates
-import uvicorn
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from fastmcp import Context
 from fastmcp.tools.tool import FunctionTool
-from wikidataMCP import tools
+from wikidataMCP import tools, utils
 
 
 templates = Jinja2Templates(directory="templates")
 mcp = tools.mcp
 mcp_app = mcp.http_app(path="/")
+# One markdown2 converter for the docs page, created on first use.
+_markdown = None
+
+
+async def _render_prompt_html() -> str:
+    global _markdown
+    if _markdown is None:
+        # Only needed for the docs page, so not imported at module load.
+        from markdown2 import Markdown
+        _markdown = Markdown()
+
+    prompt = await mcp.get_prompt("explore_wikidata")
+    prompt_rendered = await prompt.render({"query": "[User Prompt]"})
+    # markdown2 is pure Python; keep it off the event loop.
+    return await asyncio.to_thread(_markdown.convert, prompt_rendered[0].content.text)
+
+
+async def _render_docs_page() -> tuple[str, str]:
+    prompt_html = await _render_prompt_html()
+    docs_html = templates.get_template("docs.html").render(
+        tools=TOOL_NAMES,
+        prompt=prompt_html,
+    )
+    etag = f'"{hashlib.sha1(docs_html.encode()).hexdigest()}"'
+    return docs_html, etag
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Verify the vector search API key in the background so a slow
+    # vector DB does not hold up startup.
+    # Its outcome can change the search tool descriptions.
+    tools.start_vector_check().add_done_callback(
+        lambda _: _refresh_tool_route_descriptions()
+    )
+    # The docs page is static, render it once.
+    app.state.docs_page = await _render_docs_page()
+    async with mcp_app.lifespan(app):
+        yield
+    await utils.close_client()
 
 
 app = FastAPI(
     title="Wikidata Tool API",
     description="Auto-generated HTTP routes for all FastMCP tools.",
     version="0.1.0",
-    lifespan=mcp_app.lifespan,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 
-@app.middleware("http")
-async def normalize_mcp_root_path(request: Request, call_next):
-    # Accept both /mcp and /mcp/ without relying on client-side redirect handling.
-    if request.scope.get("path") == "/mcp":
-        request.scope["path"] = "/mcp/"
-    return await call_next(request)
+class NormalizeMCPRootPath:
+    """Accept both /mcp and /mcp/ without relying on client-side redirect handling."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and scope["path"] == "/mcp":
+            scope["path"] = "/mcp/"
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(NormalizeMCPRootPath)
 
 
 def _build_endpoint_signature(fn: Any) -> inspect.Signature:
@@ -67,11 +120,30 @@ def _build_endpoint_signature(fn: Any) -> inspect.Signature:
     return inspect.Signature(parameters=params)
 
 
+def _route_description(tool_obj: FunctionTool) -> str:
+    return inspect.cleandoc(tool_obj.description).replace("\n", "  \n")
+
+
+def _refresh_tool_route_descriptions() -> None:
+    # Routes copy the tool descriptions when they are registered, before
+    # the vector search key check may switch the search tools to keyword mode.
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.name.startswith("api_tool_"):
+            tool_obj = tools.TOOL_LIST[route.name.removeprefix("api_tool_")]
+            route.description = _route_description(tool_obj)
+    # FastAPI caches the generated OpenAPI schema.
+    app.openapi_schema = None
+
+
 def _register_tool_routes() -> None:
     def make_endpoint(fn: Any, tool_name: str, endpoint_signature: inspect.Signature):
-        async def endpoint(**kwargs):
+        is_coroutine = inspect.iscoroutinefunction(fn)
+
+        async def endpoint(request: Request, **kwargs):
+            # These routes bypass the MCP middleware that normally sets this.
+            token = tools.current_user_agent.set(request.headers.get("user-agent", ""))
             try:
-                if inspect.iscoroutinefunction(fn):
+                if is_coroutine:
                     result = await fn(**kwargs)
                 else:
                     result = fn(**kwargs)
@@ -79,10 +151,23 @@ def _register_tool_routes() -> None:
                 raise HTTPException(status_code=400, detail=f"Invalid arguments: {e}") from e
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"Tool execution failed: {e}") from e
-
-            return {"tool": tool_name, "result": result, "arguments": kwargs}
-
-        endpoint.__signature__ = endpoint_signature
+            finally:
+                tools.current_user_agent.reset(token)
+
+            if "text/plain" in request.headers.get("accept", ""):
+                return PlainTextResponse(str(result))
+            return ORJSONResponse({"tool": tool_name, "result": result, "arguments": kwargs})
+
+        endpoint.__signature__ = endpoint_signature.replace(
+            parameters=[
+                inspect.Parameter(
+                    "request",
+                    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                    annotation=Request,
+                ),
+                *endpoint_signature.parameters.values(),
+            ]
+        )
         return endpoint
 
     for tool_name, tool_obj in tools.TOOL_LIST.items():
@@ -93,7 +178,7 @@ def _register_tool_routes() -> None:
         endpoint_signature = _build_endpoint_signature(fn)
         route_path = f"/tool/{tool_name}"
         summary = f"Run tool: {tool_name}"
-        description = inspect.cleandoc(tool_obj.description).replace("\n", "  \n")
+        description = _route_description(tool_obj)
         endpoint_name = f"api_tool_{tool_name}"
 
         endpoint = make_endpoint(fn, tool_name, endpoint_signature)
@@ -103,23 +188,23 @@ def _register_tool_routes() -> None:
             tags=["tools"],
             summary=summary,
             description=description,
+            response_model=None,
+            response_class=PlainTextResponse,
+            responses={200: {"content": {"application/json": {}}}},
         )(endpoint)
 
 
 @app.get("/", include_in_schema=False)
 async def home(request: Request):
-    prompt = await mcp.get_prompt("explore_wikidata")
-    prompt_rendered = await prompt.render({"query": "[User Prompt]"})
-    prompt_html = markdown(prompt_rendered[0].content.text)
-
-    return templates.TemplateResponse(
-        request,
-        "docs.html",
-        {
-            "tools": tools.TOOL_LIST.keys(),
-            "prompt": prompt_html,
-        },
-    )
+    docs_page = getattr(app.state, "docs_page", None)
+    if docs_page is None:
+        docs_page = app.state.docs_page = await _render_docs_page()
+    docs_html, etag = docs_page
+
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(docs_html, headers=headers)
 
 
 @app.get("/health", tags=["meta"])
@@ -128,9 +213,24 @@ async def health():
 
 
 _register_tool_routes()
+TOOL_NAMES: tuple[str, ...] = tuple(tools.TOOL_LIST.keys())
 app.mount("/mcp", mcp_app)
 
 
 if __name__ == "__main__":
     # Run: uv run python main.py
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    import uvicorn
+
+    # Workers need an import string. "auto" picks uvloop and httptools
+    # when uvicorn[standard] installed them (uvloop is not available on Windows).
+    # Concurrency and rate limits are per process, so each extra worker
+    # multiplies the load sent to Wikidata; raise WEB_CONCURRENCY with care.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="auto",
+        http="auto",
+        workers=int(os.environ.get("WEB_CONCURRENCY", "1")),
+        access_log=False,
+    )
@@ -0,0 +1,33 @@
+import types
+
+import httpx
+import pytest
+
+from wikidataMCP import tools, utils
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """
+    Serves upstream HTTP calls from per-host handlers instead of the network.
+
+    Register a handler with `upstream.handlers["www.wikidata.org"] = fn`;
+    every request sent is recorded in `upstream.requests`.
+    """
+    handlers = {}
+    requests = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        handler = handlers.get(request.url.host)
+        if handler is None:
+            return httpx.Response(404)
+        return handler(request)
+
+    monkeypatch.setattr(utils, "_client",
+                        httpx.AsyncClient(transport=httpx.MockTransport(handle)))
+    for cached in (utils.keywordsearch, utils.execute_sparql, tools._cached_vectorsearch):
+        cached.cache_clear()
+    for store in (utils._labels_cache, utils._hierarchy_cache, utils._hierarchy_nodes_cache):
+        store.clear()
+    return types.SimpleNamespace(handlers=handlers, requests=requests)
@@ -0,0 +1,119 @@
+import asyncio
+
+import httpx
+import pytest
+
+from wikidataMCP import batch, utils
+
+
+def make_fetch(calls, error=None):
+    async def fetch(keys, **options):
+        calls.append((sorted(keys), options))
+        if error is not None:
+            raise error
+        return {key: f"{key}-{options.get('lang')}" for key in keys}
+    return fetch
+
+
+def test_concurrent_keys_share_one_fetch():
+    calls = []
+    batcher = batch.MicroBatcher(make_fetch(calls), window=0.01)
+
+    async def main():
+        return await asyncio.gather(
+            batcher.submit("Q1", lang="en"),
+            batcher.submit("Q2", lang="en"),
+            batcher.submit("Q1", lang="en"),
+        )
+
+    assert asyncio.run(main()) == ["Q1-en", "Q2-en", "Q1-en"]
+    assert calls == [(["Q1", "Q2"], {"lang": "en"})]
+
+
+def test_different_options_are_fetched_separately():
+    calls = []
+    batcher = batch.MicroBatcher(make_fetch(calls), window=0.01)
+
+    async def main():
+        return await asyncio.gather(
+            batcher.submit("Q1", lang="en"),
+            batcher.submit("Q1", lang="de"),
+        )
+
+    assert asyncio.run(main()) == ["Q1-en", "Q1-de"]
+    assert len(calls) == 2
+
+
+def test_full_batch_is_fetched_without_waiting():
+    calls = []
+    batcher = batch.MicroBatcher(make_fetch(calls), window=10, max_size=2)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(
+            batcher.submit("Q1", lang="en"),
+            batcher.submit("Q2", lang="en"),
+        ), timeout=1)
+
+    assert asyncio.run(main()) == ["Q1-en", "Q2-en"]
+
+
+def test_missing_key_resolves_to_none():
+    async def fetch(keys, **options):
+        return {}
+
+    batcher = batch.MicroBatcher(fetch, window=0.01)
+    assert asyncio.run(batcher.submit("Q1")) is None
+
+
+def test_per_key_error_is_isolated():
+    calls = []
+
+    async def fetch(keys, **options):
+        calls.append(sorted(keys))
+        if "Q404" in keys:
+            raise KeyError("Q404")
+        return {key: key for key in keys}
+
+    batcher = batch.MicroBatcher(fetch, window=0.01, split_on=utils.is_per_key_error)
+
+    async def main():
+        return await asyncio.gather(
+            batcher.submit("Q1"),
+            batcher.submit("Q404"),
+            return_exceptions=True,
+        )
+
+    ok, failed = asyncio.run(main())
+    assert ok == "Q1"
+    assert isinstance(failed, KeyError)
+    assert calls == [["Q1", "Q404"], ["Q1"], ["Q404"]]
+
+
+@pytest.mark.parametrize("error", [
+    httpx.HTTPStatusError(
+        "throttled",
+        request=httpx.Request("GET", "https://www.wikidata.org"),
+        response=httpx.Response(429),
+    ),
+    httpx.HTTPStatusError(
+        "unavailable",
+        request=httpx.Request("GET", "https://www.wikidata.org"),
+        response=httpx.Response(503),
+    ),
+    httpx.ConnectTimeout("timeout"),
+])
+def test_upstream_error_fails_batch_without_retrying_keys(error):
+    calls = []
+    batcher = batch.MicroBatcher(make_fetch(calls, error),
+                                 window=0.01,
+                                 split_on=utils.is_per_key_error)
+
+    async def main():
+        return await asyncio.gather(
+            *(batcher.submit(f"Q{i}") for i in range(10)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(main())
+    assert all(result is error for result in results)
+    assert len(calls) == 1
@@ -0,0 +1,147 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from wikidataMCP import cache
+
+
+def test_ttl_cache_entries_expire():
+    store = cache.TTLCache(ttl=0.05)
+    store.set("key", "value")
+    assert store.get("key") == "value"
+    time.sleep(0.1)
+    assert store.get("key") is None
+    assert len(store) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    store = cache.TTLCache(maxsize=2)
+    store.set("a", 1)
+    store.set("b", 2)
+    store.get("a")
+    store.set("c", 3)
+    assert store.get("a") == 1
+    assert store.get("b") is None
+    assert store.get("c") == 3
+
+
+def test_ttl_cache_keeps_stale_entries_for_get_stale():
+    store = cache.TTLCache(ttl=0.05, stale_ttl=10)
+    store.set("key", "value")
+    time.sleep(0.1)
+    assert store.get("key") is None
+    assert store.get_stale("key") == "value"
+
+
+def test_decorator_caches_results():
+    calls = []
+
+    @cache.ttl_cache(ttl=10)
+    async def double(x):
+        calls.append(x)
+        return x * 2
+
+    async def main():
+        return [await double(2), await double(2), await double(3)]
+
+    assert asyncio.run(main()) == [4, 4, 6]
+    assert calls == [2, 3]
+
+
+def test_decorator_shares_in_flight_calls():
+    calls = []
+
+    @cache.ttl_cache(ttl=10)
+    async def slow(x):
+        calls.append(x)
+        await asyncio.sleep(0.05)
+        return x
+
+    async def main():
+        return await asyncio.gather(*(slow(1) for _ in range(5)))
+
+    assert asyncio.run(main()) == [1] * 5
+    assert calls == [1]
+
+
+def test_decorator_does_not_cache_errors():
+    calls = []
+
+    @cache.ttl_cache(ttl=10)
+    async def flaky(x):
+        calls.append(x)
+        if len(calls) == 1:
+            raise RuntimeError("first call fails")
+        return x
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await flaky(1)
+        return await flaky(1)
+
+    assert asyncio.run(main()) == 1
+    assert calls == [1, 1]
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    @cache.ttl_cache(ttl=10)
+    async def slow(x):
+        await asyncio.sleep(0.05)
+        return x
+
+    async def main():
+        first = asyncio.ensure_future(slow(1))
+        second = asyncio.ensure_future(slow(1))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 1
+
+
+def test_decorator_serves_stale_result_on_listed_errors():
+    state = {"fail": False}
+
+    @cache.ttl_cache(ttl=0.05, stale_on=(httpx.HTTPError,), stale_ttl=10)
+    async def fetch(x):
+        if state["fail"]:
+            raise httpx.ConnectError("down")
+        return x
+
+    async def main():
+        assert await fetch(1) == 1
+        await asyncio.sleep(0.1)
+        state["fail"] = True
+        assert await fetch(1) == 1
+        with pytest.raises(httpx.ConnectError):
+            await fetch(2)
+
+    asyncio.run(main())
+
+
+def test_decorator_without_stale_on_raises():
+    @cache.ttl_cache(ttl=0.05)
+    async def fetch(x):
+        raise httpx.ConnectError("down")
+
+    async def main():
+        with pytest.raises(httpx.ConnectError):
+            await fetch(1)
+
+    asyncio.run(main())
+
+
+def test_ttl_cache_cached_looks_up_without_calling():
+    calls = []
+
+    @cache.ttl_cache(key=lambda x, user_agent="": x)
+    async def double(x, user_agent=""):
+        calls.append(x)
+        return x * 2
+
+    assert double.cached(2) is None
+    assert asyncio.run(double(2, user_agent="a")) == 4
+    assert double.cached(2, user_agent="b") == 4
+    assert calls == [2]
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+from wikidataMCP import ratelimit
+
+
+def test_burst_up_to_max_rate_is_immediate():
+    limiter = ratelimit.RateLimiter(5)
+
+    async def main():
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) < 0.05
+
+
+def test_requests_beyond_the_burst_are_paced():
+    limiter = ratelimit.RateLimiter(10)
+
+    async def main():
+        start = time.monotonic()
+        for _ in range(13):
+            async with limiter:
+                pass
+        return time.monotonic() - start
+
+    # Three requests past the burst of 10 need about 0.3 seconds to drain.
+    elapsed = asyncio.run(main())
+    assert 0.25 < elapsed < 0.6
+
+
+def test_fractional_rate_admits_one_request_at_a_time():
+    limiter = ratelimit.RateLimiter(0.5, time_period=0.1)
+
+    async def main():
+        start = time.monotonic()
+        await asyncio.wait_for(limiter.acquire(), 0.05)
+        first = time.monotonic() - start
+        await asyncio.wait_for(limiter.acquire(), 1)
+        return first, time.monotonic() - start
+
+    # 0.5 requests per 0.1 seconds: the second one waits about 0.2 seconds.
+    first, second = asyncio.run(main())
+    assert first < 0.05
+    assert 0.15 < second < 0.5
@@ -0,0 +1,297 @@
+import asyncio
+from urllib.parse import parse_qs
+
+import httpx
+import orjson
+
+from wikidataMCP import tools, utils
+
+
+def textifier_claims(request: httpx.Request) -> httpx.Response:
+    # Every known entity has one value for each requested property.
+    entities = {}
+    for eid in request.url.params["id"].split(","):
+        if eid == "Q404":
+            continue
+        entities[eid] = {
+            "label": f"Label {eid}",
+            "claims": [
+                {
+                    "PID": pid,
+                    "property_label": f"property {pid}",
+                    "values": [{"value": {"QID": "Q5", "label": "human"}, "rank": "normal"}],
+                }
+                for pid in request.url.params["pid"].split(",")
+            ],
+        }
+    return httpx.Response(200, json=entities)
+
+
+def test_statement_values_accept_comma_separated_ids(upstream):
+    upstream.handlers["wd-textify.wmcloud.org"] = textifier_claims
+
+    text = asyncio.run(tools.get_statement_values.fn(" Q42, Q1,Q42 ", "P31, P279, P31"))
+
+    assert len(upstream.requests) == 1
+    params = upstream.requests[0].url.params
+    assert params["id"] == "Q42,Q1"
+    assert params["pid"] == "P31,P279"
+    assert text.split("\n\n")[0].splitlines()[0] == (
+        "Label Q42 (Q42): property P31 (P31): human (Q5)"
+    )
+    assert "Label Q1 (Q1): property P279 (P279): human (Q5)" in text
+    assert "P31,P279" not in text
+
+
+def test_statement_values_report_missing_entities(upstream):
+    upstream.handlers["wd-textify.wmcloud.org"] = textifier_claims
+
+    text = asyncio.run(tools.get_statement_values.fn("Q404,Q42", "P31"))
+
+    missing, found = text.split("\n\n")
+    assert missing == "Entity Q404 not found"
+    assert found.startswith("Label Q42 (Q42): property P31 (P31)")
+
+
+def test_statement_values_fall_back_to_the_single_requested_pid(upstream):
+    def textifier(request):
+        return httpx.Response(200, json={"Q42": {"label": "Douglas Adams", "claims": [
+            {"property_label": "occupation",
+             "values": [{"value": {"QID": "Q6625963", "label": "novelist"}}]},
+        ]}})
+    upstream.handlers["wd-textify.wmcloud.org"] = textifier
+
+    text = asyncio.run(tools.get_statement_values.fn("Q42", "P106"))
+
+    assert text.startswith("Douglas Adams (Q42): occupation (P106): novelist (Q6625963)")
+
+
+def test_malformed_ids_are_rejected_without_a_request(upstream):
+    calls = [
+        (tools.get_statements.fn, ("Douglas Adams",),
+         "Invalid entity ID: 'Douglas Adams'. Expected a QID or PID such as \"Q42\" or \"P31\"."),
+        (tools.get_statement_values.fn, ("Q42, q5", "P31"),
+         "Invalid entity ID: 'q5'. Expected a QID or PID such as \"Q42\" or \"P31\"."),
+        (tools.get_statement_values.fn, ("Q42", "P31,Q5"),
+         "Invalid property ID: 'Q5'. Expected a PID such as \"P31\"."),
+        (tools.get_instance_and_subclass_hierarchy.fn, ("wd:Q42",),
+         "Invalid entity ID: 'wd:Q42'. Expected a QID or PID such as \"Q42\" or \"P31\"."),
+        (tools.get_statements.fn, (" , ",), "Entity ID cannot be empty."),
+        (tools.get_statement_values.fn, ("Q42", ""), "Property ID cannot be empty."),
+    ]
+    for fn, args, expected in calls:
+        assert asyncio.run(fn(*args)) == expected
+    assert upstream.requests == []
+
+
+# Q42 -P31-> Q5 -P279-> Q215627 and Q729, Q215627 -P279-> Q729.
+HIERARCHY = {
+    "Q42": {"P31": ["Q5"]},
+    "Q5": {"P279": ["Q215627", "Q729"]},
+    "Q215627": {"P279": ["Q729"]},
+    "Q729": {},
+}
+
+
+def textifier_hierarchy(graph: dict):
+    labels = {"P31": "instance of", "P279": "subclass of"}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        entities = {}
+        for eid in request.url.params["id"].split(","):
+            if eid not in graph:
+                continue
+            entities[eid] = {"label": f"L{eid}", "claims": [
+                {"PID": pid, "property_label": labels[pid], "values": [
+                    {"value": {"QID": parent, "label": f"L{parent}"}, "rank": "normal"}
+                    for parent in parents
+                ]}
+                for pid, parents in graph[eid].items()
+            ]}
+        return httpx.Response(200, json=entities)
+
+    return handler
+
+
+def test_hierarchy_rejects_max_nodes_out_of_range(upstream):
+    upstream.handlers["wd-textify.wmcloud.org"] = textifier_hierarchy(HIERARCHY)
+    expected = f"max_nodes must be between 1 and {utils.HIERARCHY_MAX_NODES}."
+
+    for max_nodes in (0, -1, utils.HIERARCHY_MAX_NODES + 1):
+        text = asyncio.run(tools.get_instance_and_subclass_hierarchy.fn("Q42", max_nodes=max_nodes))
+        assert text == expected
+    assert upstream.requests == []
+
+
+def test_hierarchy_marks_parents_cut_off_by_max_nodes(upstream):
+    upstream.handlers["wd-textify.wmcloud.org"] = textifier_hierarchy(HIERARCHY)
+
+    text = asyncio.run(tools.get_instance_and_subclass_hierarchy.fn("Q42", max_nodes=2))
+
+    assert orjson.loads(text) == {
+        "LQ42 (Q42)": {
+            "instance of (P31)": [{
+                "LQ5 (Q5)": {
+                    "instance of (P31)": [],
+                    "subclass of (P279)": ["...truncated"],
+                },
+            }],
+            "subclass of (P279)": [],
+        },
+    }
+
+
+def test_hierarchy_within_max_nodes_is_not_truncated(upstream):
+    upstream.handlers["wd-textify.wmcloud.org"] = textifier_hierarchy(HIERARCHY)
+
+    text = asyncio.run(tools.get_instance_and_subclass_hierarchy.fn("Q42"))
+
+    assert "...truncated" not in text
+    assert "LQ729 (Q729)" in text
+
+
+def test_hierarchy_deeper_than_orjson_nesting_limit(upstream):
+    # Q1 and Q2 are subclasses of each other, so the tree nests up to max_depth.
+    upstream.handlers["wd-textify.wmcloud.org"] = textifier_hierarchy({
+        "Q1": {"P279": ["Q2"]},
+        "Q2": {"P279": ["Q1"]},
+    })
+
+    text = asyncio.run(tools.get_instance_and_subclass_hierarchy.fn("Q1", max_depth=120))
+
+    tree = orjson.loads(text)
+    depth = 0
+    while isinstance(tree, dict):
+        (node,) = tree.values()
+        tree = node["subclass of (P279)"][0]
+        depth += 1
+    assert depth == 120
+    assert tree in ("LQ1 (Q1)", "LQ2 (Q2)")
+
+
+def wikidata_api(request: httpx.Request) -> httpx.Response:
+    params = request.url.params
+    if params["action"] == "wbsearchentities":
+        return httpx.Response(200, json={"search": [
+            {"id": "Q42", "display": {"label": {"value": "Douglas Adams"},
+                                      "description": {"value": "English writer"}}},
+        ]})
+    if params["action"] == "wbgetentities":
+        return httpx.Response(200, json={"entities": {
+            eid: {"labels": {"en": {"value": f"Label {eid}"}},
+                  "descriptions": {"en": {"value": f"Description {eid}"}}}
+            for eid in params["ids"].split("|")
+        }})
+    return httpx.Response(400)
+
+
+def enable_vector_search(monkeypatch, vector_results: list):
+    async def enabled():
+        return True
+    monkeypatch.setattr(tools, "vector_search_enabled", enabled)
+    monkeypatch.setattr(tools, "WD_VECTORDB_API_SECRET", "secret")
+    return lambda request: httpx.Response(200, json=vector_results)
+
+
+def test_search_falls_back_to_keywords_when_vector_search_finds_nothing(upstream, monkeypatch):
+    upstream.handlers["wd-vectordb.wmcloud.org"] = enable_vector_search(monkeypatch, [])
+    upstream.handlers["www.wikidata.org"] = wikidata_api
+
+    text = asyncio.run(tools._search("douglas adams", "item", "en", "text"))
+
+    assert text == "Q42: Douglas Adams — English writer"
+
+
+def test_search_falls_back_to_keywords_when_vector_search_fails(upstream, monkeypatch):
+    enable_vector_search(monkeypatch, [])
+    upstream.handlers["wd-vectordb.wmcloud.org"] = lambda request: httpx.Response(401)
+    upstream.handlers["www.wikidata.org"] = wikidata_api
+
+    text = asyncio.run(tools._search("douglas adams", "item", "en", "text"))
+
+    assert text == "Q42: Douglas Adams — English writer"
+
+
+def test_cached_vector_results_skip_keyword_search(upstream, monkeypatch):
+    upstream.handlers["wd-vectordb.wmcloud.org"] = enable_vector_search(
+        monkeypatch, [{"QID": "Q5"}, {"QID": "Q42"}]
+    )
+    upstream.handlers["www.wikidata.org"] = wikidata_api
+
+    first = asyncio.run(tools._search("Douglas Adams", "item", "en", "text"))
+    # Only the vector result is cached, so a keyword search would be sent again.
+    utils.keywordsearch.cache_clear()
+    sent = len(upstream.requests)
+    second = asyncio.run(tools._search("douglas adams ", "item", "en", "text"))
+
+    assert first == second == (
+        "Q5: Label Q5 — Description Q5\n"
+        "Q42: Label Q42 — Description Q42"
+    )
+    assert len(upstream.requests) == sent
+
+
+def disable_vector_search(monkeypatch):
+    async def enabled():
+        return False
+    monkeypatch.setattr(tools, "vector_search_enabled", enabled)
+
+
+def test_search_json_format(upstream, monkeypatch):
+    disable_vector_search(monkeypatch)
+    upstream.handlers["www.wikidata.org"] = wikidata_api
+
+    text = asyncio.run(tools.search_items.fn("Douglas Adams", format="json"))
+
+    assert orjson.loads(text) == {
+        "Q42": {"label": "Douglas Adams", "description": "English writer"},
+    }
+
+
+def test_search_json_format_without_matches(upstream, monkeypatch):
+    disable_vector_search(monkeypatch)
+    upstream.handlers["www.wikidata.org"] = (
+        lambda request: httpx.Response(200, json={"search": []})
+    )
+
+    assert asyncio.run(tools.search_properties.fn("nothing", format="json")) == "{}"
+    text = asyncio.run(tools.search_properties.fn("nothing else"))
+    assert text.startswith("No matching Wikidata")
+
+
+def query_service(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={
+        "head": {"vars": ["human"]},
+        "results": {"bindings": [
+            {"human": {"type": "uri", "value": "http://www.wikidata.org/entity/Q42"}},
+            {"human": {"type": "uri", "value": "http://www.wikidata.org/entity/Q820"}},
+        ]},
+    })
+
+
+def test_short_sparql_queries_are_sent_with_get(upstream):
+    upstream.handlers["query.wikidata.org"] = query_service
+    query = "SELECT ?human WHERE { ?human wdt:P31 wd:Q5 } LIMIT 2"
+
+    text = asyncio.run(tools.execute_sparql.fn(query))
+
+    assert text == ";human\n0;Q42\n1;Q820\n"
+    (request,) = upstream.requests
+    assert request.method == "GET"
+    assert request.url.params["query"] == query
+    assert request.content == b""
+
+
+def test_long_sparql_queries_are_sent_with_post(upstream):
+    upstream.handlers["query.wikidata.org"] = query_service
+    # Padding with a comment keeps the query valid.
+    query = "SELECT ?human WHERE { ?human wdt:P31 wd:Q5 } LIMIT 2\n#" + "x" * utils.SPARQL_MAX_GET_LENGTH
+
+    text = asyncio.run(tools.execute_sparql.fn(query))
+
+    assert text == ";human\n0;Q42\n1;Q820\n"
+    (request,) = upstream.requests
+    assert request.method == "POST"
+    assert "query" not in request.url.params
+    assert request.headers["content-type"] == "application/x-www-form-urlencoded"
+    assert parse_qs(request.content.decode())["query"] == [query]
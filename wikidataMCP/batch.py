@@ -0,0 +1,98 @@
+"""Request coalescing for upstream Wikidata calls"""
+import asyncio
+import os
+
+BATCH_WINDOW_SECONDS = float(os.environ.get("BATCH_WINDOW_SECONDS", "0.01"))
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-key lookups into batched upstream calls.
+
+    Keys submitted with the same options within `window` seconds are fetched
+    together with one call to `fetch(keys, **options)`, which must return a
+    dictionary mapping each key to its result.
+
+    A failed batch is retried key by key only when `split_on(exception)` is
+    true, i.e. when a single bad key may have caused it. Other errors, such
+    as throttling or an unavailable upstream, fail every caller at once.
+
+    Args:
+        fetch (callable): Coroutine function fetching a list of keys at once.
+        window (float, optional): Time to wait for more keys before fetching. Defaults to BATCH_WINDOW_SECONDS.
+        max_size (int, optional): Maximum number of keys per upstream call. Defaults to 50.
+        split_on (callable, optional): Tells from an exception whether to retry the keys one by one. Defaults to never.
+    """
+
+    def __init__(self,
+                 fetch,
+                 window: float = BATCH_WINDOW_SECONDS,
+                 max_size: int = 50,
+                 split_on=None):
+        self.fetch = fetch
+        self.window = window
+        self.max_size = max_size
+        self.split_on = split_on
+        self._pending = {}
+        self._tasks = set()
+
+    async def submit(self, key, **options):
+        """
+        Queues a key for the next batch and waits for its result.
+
+        Args:
+            key (str): The key to fetch, e.g. a QID.
+            **options: Keyword arguments forwarded to `fetch`. Only keys with identical options share a batch.
+
+        Returns:
+            The value returned by `fetch` for this key, or None if it is missing from the response.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        batch_key = tuple(sorted(options.items()))
+        batch = self._pending.get(batch_key)
+        if batch is None:
+            batch = self._pending[batch_key] = {}
+            loop.call_later(self.window, self._flush, batch_key, batch)
+
+        batch.setdefault(key, []).append(future)
+        if len(batch) >= self.max_size:
+            self._flush(batch_key, batch)
+
+        return await future
+
+    def _flush(self, batch_key, batch) -> None:
+        # The timer still fires for batches already flushed for being full.
+        if self._pending.get(batch_key) is not batch:
+            return
+        del self._pending[batch_key]
+
+        task = asyncio.create_task(self._run(batch, dict(batch_key)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: dict, options: dict) -> None:
+        try:
+            results = await self.fetch(list(batch), **options)
+        except Exception as e:
+            if len(batch) > 1 and self.split_on is not None and self.split_on(e):
+                # Retry keys one by one so a single bad key
+                # does not fail every caller in the batch.
+                await asyncio.gather(*(
+                    self._run({key: futures}, options)
+                    for key, futures in batch.items()
+                ))
+                return
+
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        results = results or {}
+        for key, futures in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(results.get(key))
@@ -0,0 +1,149 @@
+"""In-process caching helpers for upstream Wikidata calls"""
+from collections import OrderedDict
+import asyncio
+import functools
+import os
+import time
+
+CACHE_TTL_SECONDS = float(os.environ.get("CACHE_TTL_SECONDS", "600"))
+CACHE_MAXSIZE = int(os.environ.get("CACHE_MAXSIZE", "2048"))
+# How long expired entries remain available as a fallback when upstream fails.
+CACHE_STALE_SECONDS = float(os.environ.get("CACHE_STALE_SECONDS", "3600"))
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU mapping whose entries expire after a fixed time-to-live.
+
+    Expired entries are kept for another `stale_ttl` seconds, during which
+    only `get_stale` returns them.
+
+    Args:
+        maxsize (int, optional): Maximum number of entries kept. Defaults to CACHE_MAXSIZE.
+        ttl (float, optional): Lifetime of an entry in seconds. Defaults to CACHE_TTL_SECONDS.
+        stale_ttl (float, optional): Time in seconds an expired entry stays available to `get_stale`. Defaults to 0.
+    """
+
+    def __init__(self,
+                 maxsize: int = CACHE_MAXSIZE,
+                 ttl: float = CACHE_TTL_SECONDS,
+                 stale_ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        now = time.monotonic()
+        if expires_at < now:
+            if expires_at + self.stale_ttl < now:
+                del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def get_stale(self, key, default=None):
+        """
+        Returns an entry even if it has expired, as long as it is within its stale period.
+        """
+        entry = self._data.get(key)
+        if entry is None or entry[0] + self.stale_ttl < time.monotonic():
+            return default
+        return entry[1]
+
+    def set(self, key, value) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+def ttl_cache(maxsize: int = CACHE_MAXSIZE,
+              ttl: float = CACHE_TTL_SECONDS,
+              key=None,
+              stale_on: tuple = (),
+              stale_ttl: float = CACHE_STALE_SECONDS):
+    """
+    Caches the results of a coroutine function in a TTLCache.
+
+    Cached values are shared between callers and must not be mutated.
+    Concurrent calls with the same key share a single in-flight call.
+    When a call fails with one of the `stale_on` exceptions, an expired
+    result for the same key is returned instead, if there is one.
+    `wrapper.cached(*args, **kwargs)` returns the cached result for the
+    given arguments, or None, without calling the function.
+
+    Args:
+        maxsize (int, optional): Maximum number of cached results. Defaults to CACHE_MAXSIZE.
+        ttl (float, optional): Lifetime of a cached result in seconds. Defaults to CACHE_TTL_SECONDS.
+        key (callable, optional): Builds the cache key from the call arguments. Defaults to all arguments.
+        stale_on (tuple, optional): Exception types for which expired results are served. Defaults to none.
+        stale_ttl (float, optional): Time in seconds expired results remain usable. Defaults to CACHE_STALE_SECONDS.
+
+    Returns:
+        callable: A decorator for async functions.
+    """
+    def decorator(fn):
+        cache = TTLCache(maxsize=maxsize,
+                         ttl=ttl,
+                         stale_ttl=stale_ttl if stale_on else 0.0)
+        inflight = {}
+
+        def finish(cache_key, task):
+            if inflight.get(cache_key) is task:
+                del inflight[cache_key]
+            # Reading the exception also marks it as retrieved when every caller was cancelled.
+            if not task.cancelled() and task.exception() is None:
+                cache.set(cache_key, task.result())
+
+        def make_key(*args, **kwargs):
+            if key is not None:
+                return key(*args, **kwargs)
+            return (args, tuple(sorted(kwargs.items())))
+
+        def cached(*args, **kwargs):
+            # Looks up a fresh result without calling the function.
+            return cache.get(make_key(*args, **kwargs))
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            cache_key = make_key(*args, **kwargs)
+            value = cache.get(cache_key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            task = inflight.get(cache_key)
+            if task is None:
+                task = asyncio.ensure_future(fn(*args, **kwargs))
+                inflight[cache_key] = task
+                task.add_done_callback(functools.partial(finish, cache_key))
+
+            try:
+                # A cancelled caller must not cancel the call other callers wait on.
+                return await asyncio.shield(task)
+            except stale_on:
+                value = cache.get_stale(cache_key, _MISSING)
+                if value is _MISSING:
+                    raise
+                return value
+
+        wrapper.cache = cache
+        wrapper.cached = cached
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
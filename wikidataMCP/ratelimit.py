@@ -0,0 +1,50 @@
+"""Request pacing for upstream Wikidata calls"""
+import asyncio
+import time
+
+
+class RateLimiter:
+    """
+    Leaky-bucket limiter pacing requests to at most `max_rate` per `time_period`.
+
+    Bursts up to `max_rate` requests (at least one) go through immediately,
+    later requests wait until the bucket has drained enough. Use it as
+    `async with limiter:`.
+
+    Args:
+        max_rate (float): Number of requests allowed per time period.
+        time_period (float, optional): Length of the time period in seconds. Defaults to 1.
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 1.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._rate_per_sec = max_rate / time_period
+        # A bucket smaller than one request would never admit anything.
+        self._capacity = max(1.0, max_rate)
+        self._level = 0.0
+        self._last_check = time.monotonic()
+
+    def _leak(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last_check
+        self._level = max(0.0, self._level - elapsed * self._rate_per_sec)
+        self._last_check = now
+
+    async def acquire(self) -> None:
+        """
+        Waits until one more request fits in the bucket, then takes its slot.
+        """
+        while True:
+            self._leak()
+            if self._level + 1 <= self._capacity:
+                self._level += 1
+                return
+            await asyncio.sleep((self._level + 1 - self._capacity) / self._rate_per_sec)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
@@ -1,220 +1,285 @@
+from contextvars import ContextVar
+from types import MappingProxyType
+from typing import Literal
 from fastmcp import FastMCP
 from fastmcp.server.dependencies import get_http_headers
-from wikidataMCP import utils
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from wikidataMCP import batch, cache, utils
+import asyncio
 import os
+import csv
+import io
 import json
-import requests
+import logging
+import orjson
+import re
+import httpx
 
 mcp = FastMCP("Wikidata MCP")
+logger = logging.getLogger(__name__)
 
 WD_VECTORDB_API_SECRET = os.environ.get("WD_VECTORDB_API_SECRET")
-VECTOR_ENABLED = utils.vectorsearch_verify_apikey(WD_VECTORDB_API_SECRET)
 
-def _current_user_agent() -> str:
-    try:
-        return get_http_headers().get("User-Agent", "")
-    except Exception:
-        return ""
+# User-Agent of the client behind the current tool call, forwarded upstream.
+current_user_agent: ContextVar[str] = ContextVar("current_user_agent", default="")
+
+class UserAgentMiddleware(Middleware):
+    """Reads the client's User-Agent once per tool call into `current_user_agent`."""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        # get_http_headers() lowercases header names and is empty outside HTTP.
+        token = current_user_agent.set(get_http_headers().get("user-agent", ""))
+        try:
+            return await call_next(context)
+        finally:
+            current_user_agent.reset(token)
+
+mcp.add_middleware(UserAgentMiddleware())
+
+# Malformed IDs are rejected before any request is sent.
+ENTITY_ID_RE = re.compile(r"^[QP]\d+$")
+PROPERTY_ID_RE = re.compile(r"^P\d+$")
+
+def _invalid_entity_id(entity_ids: list[str]) -> str | None:
+    for eid in entity_ids:
+        if not ENTITY_ID_RE.match(eid):
+            return f"Invalid entity ID: {eid!r}. Expected a QID or PID such as \"Q42\" or \"P31\"."
+    return None
+
+def _invalid_property_id(property_ids: list[str]) -> str | None:
+    for pid in property_ids:
+        if not PROPERTY_ID_RE.match(pid):
+            return f"Invalid property ID: {pid!r}. Expected a PID such as \"P31\"."
+    return None
+
+def _split_ids(value: str) -> list[str]:
+    # Tools accept several IDs separated by commas, e.g. "Q42, Q5".
+    return list(dict.fromkeys(x.strip() for x in value.split(",") if x.strip()))
+
+def _format_search_results(results: dict,
+                           entity_type: str,
+                           format: str = "text") -> str:
+    if format == "json":
+        return orjson.dumps({
+            entity_id: {
+                "label": val.get("label", ""),
+                "description": val.get("description", ""),
+            }
+            for entity_id, val in results.items()
+        }).decode()
 
-def _format_search_results(results: dict, entity_type: str) -> str:
     if not results:
         return f"No matching Wikidata {entity_type}s found."
 
-    text_val = [
+    return "\n".join(
         f"{entity_id}: {val.get('label', '')} — {val.get('description', '')}"
         for entity_id, val in results.items()
-    ]
-    return "\n".join(text_val)
-
-# Enable vector search if the API key is set
-if VECTOR_ENABLED:
-
-    @mcp.tool()
-    async def search_items(query: str, lang: str = 'en') -> str:
-        """Search Wikidata items (QIDs) using vector and keyword search.
-        Find conceptually similar Wikidata items from a natural-language query. Matches are based on meaning and exact words.
-
-        Args:
-            query: Natural-language description of the concept to find.
-            lang: Language code for the search (default: 'en').
-
-        Returns:
-            Newline-separated results in the form:
-                QID: label — description
-
-        Example:
-            >>> vector_search_items("English science-fiction novel")
-            Q23163: A Scientific Romance — 1997 novel by Ronald Wright
-            Q627333: The Time Machine — 1895 dystopian science fiction novella by H. G. Wells
-        """
-        if not query.strip():
-            return "Query cannot be empty."
-
-        user_agent = _current_user_agent()
-        try:
-            results = await utils.vectorsearch(
+    )
+
+def _results_to_csv(columns: list[str], rows: list[tuple]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=';', lineterminator='\n')
+    writer.writerow(['', *columns])
+    # csv writes unbound (None) values as empty cells.
+    writer.writerows((index, *row) for index, row in enumerate(rows))
+    return buffer.getvalue()
+
+@cache.ttl_cache(
+    key=lambda query, type="item", lang="en", user_agent="": (
+        query.strip().lower(), type, lang
+    ),
+    stale_on=(httpx.HTTPError,),
+)
+async def _cached_vectorsearch(query: str,
+                               type: str = "item",
+                               lang: str = "en",
+                               user_agent: str = "") -> dict:
+    # Agents often repeat the same query; skip the vector DB round trip.
+    return await utils.vectorsearch(
+        query,
+        WD_VECTORDB_API_SECRET,
+        type=type,
+        lang=lang,
+        user_agent=user_agent,
+    )
+
+# Concurrent get_statements calls are merged into one textifier request.
+_statements_batcher = batch.MicroBatcher(utils.get_entities_triplets,
+                                         split_on=utils.is_per_key_error)
+
+_vector_check: asyncio.Task | None = None
+
+async def _verify_vector_apikey() -> bool:
+    enabled = await utils.vectorsearch_verify_apikey(WD_VECTORDB_API_SECRET)
+    if not enabled:
+        _use_keyword_search_descriptions()
+        # stdout carries the JSON-RPC stream under the stdio transport.
+        logger.warning(
+            "WD_VECTORDB_API_SECRET not set or invalid: "
+            "vector search is disabled, using keyword search only."
+        )
+    return enabled
+
+def start_vector_check() -> asyncio.Task:
+    """Start verifying the vector DB API key without waiting for the result."""
+    global _vector_check
+    if _vector_check is None:
+        _vector_check = asyncio.create_task(_verify_vector_apikey())
+    return _vector_check
+
+async def vector_search_enabled() -> bool:
+    """Verify the vector DB API key once and cache the outcome."""
+    # Tool calls arriving before the check finishes share it.
+    return await asyncio.shield(start_vector_check())
+
+async def _search(query: str, type: str, lang: str, format: str) -> str:
+    # Shared by search_items and search_properties.
+    if not query.strip():
+        return "Query cannot be empty."
+
+    user_agent = current_user_agent.get()
+    results = None
+    keyword_task = None
+    if await vector_search_enabled():
+        results = _cached_vectorsearch.cached(query, type=type, lang=lang)
+        if not results:
+            # Start the keyword fallback right away so a failing vector search
+            # does not add its own latency before the fallback even starts.
+            # It is not cancelled when vector search succeeds: keywordsearch
+            # shields its request, which then still fills its cache.
+            keyword_task = asyncio.create_task(utils.keywordsearch(
                 query,
-                WD_VECTORDB_API_SECRET,
+                type=type,
                 lang=lang,
                 user_agent=user_agent,
+            ))
+            # Mark the fallback's exception as retrieved when it is not used.
+            keyword_task.add_done_callback(
+                lambda task: task.cancelled() or task.exception()
             )
-        except requests.RequestException:
-            try:
-                results = await utils.keywordsearch(
-                    query,
-                    type="item",
-                    lang=lang,
-                    user_agent=user_agent,
-                )
-            except requests.RequestException:
-                return "Wikidata is currently unavailable. Please retry shortly."
-        except Exception:
+
             try:
-                results = await utils.keywordsearch(
+                results = await _cached_vectorsearch(
                     query,
-                    type="item",
+                    type=type,
                     lang=lang,
                     user_agent=user_agent,
                 )
-            except requests.RequestException:
-                return "Wikidata is currently unavailable. Please retry shortly."
             except Exception:
-                return "Unexpected server error while processing the request."
-
-        return _format_search_results(results, "item")
+                pass
+        # No vector matches falls back to keyword search, like a failure.
+        if not results:
+            results = None
 
-
-    @mcp.tool()
-    async def search_properties(query: str, lang: str = 'en') -> str:
-        """Search Wikidata properties (PIDs) using vector and keyword search.
-        Find relevant Wikidata properties from a natural-language description of the relationship you need. Matches are based on meaning and exact words.
-
-        Args:
-            query: Natural-language description of the concept to find.
-            lang: Language code for the search (default: 'en').
-
-        Returns:
-            Newline-separated results in the form:
-                PID: label — description
-
-        Example:
-            >>> vector_search_properties("residence of a person")
-            P551: residence — the place where the person is or has been, resident
-            P276: location — location of the object, structure or event
-        """
-        if not query.strip():
-            return "Query cannot be empty."
-
-        user_agent = _current_user_agent()
+    if results is None:
         try:
-            results = await utils.vectorsearch(
+            results = await (keyword_task or utils.keywordsearch(
                 query,
-                WD_VECTORDB_API_SECRET,
-                type="property",
+                type=type,
                 lang=lang,
                 user_agent=user_agent,
-            )
-        except requests.RequestException:
-            try:
-                results = await utils.keywordsearch(
-                    query,
-                    type="property",
-                    lang=lang,
-                    user_agent=user_agent,
-                )
-            except requests.RequestException:
-                return "Wikidata is currently unavailable. Please retry shortly."
+            ))
+        except httpx.HTTPError:
+            return "Wikidata is currently unavailable. Please retry shortly."
         except Exception:
-            try:
-                results = await utils.keywordsearch(
-                    query,
-                    type="property",
-                    lang=lang,
-                    user_agent=user_agent,
-                )
-            except requests.RequestException:
-                return "Wikidata is currently unavailable. Please retry shortly."
-            except Exception:
-                return "Unexpected server error while processing the request."
+            return "Unexpected server error while processing the request."
 
-        return _format_search_results(results, "property")
+    return _format_search_results(results, type, format)
 
-else:
-    print(
-        "WD_VECTORDB_API_SECRET not set: \
-        vector search tools are not registered."
-    )
 
-    @mcp.tool()
-    async def search_items(query: str, lang: str = 'en') -> str:
-        """Search Wikidata items (QIDs) with exact text matching.
-        Looks up items by label/alias or literal phrases expected to appear in Wikidata. Useful when you already know the entity you're looking for.
+@mcp.tool()
+async def search_items(query: str,
+                       lang: str = 'en',
+                       format: Literal["text", "json"] = "text") -> str:
+    """Search Wikidata items (QIDs) using vector and keyword search.
+    Find conceptually similar Wikidata items from a natural-language query. Matches are based on meaning and exact words.
 
-        Args:
-            query: Label, alias, or phrase expected to appear verbatim.
-            lang: Language code for the search (default: 'en').
+    Args:
+        query: Natural-language description of the concept to find.
+        lang: Language code for the search (default: 'en').
+        format: "text" for one line per result, or "json" for an object mapping each QID to its label and description (default: "text").
 
-        Returns:
-            Newline-separated lines in the form:
+    Returns:
+        Newline-separated results in the form:
             QID: label — description
 
-        Example:
-            >>> keyword_search_items("Douglas Adams")
-            Q42: Douglas Adams — English science fiction writer and humorist
-            Q28421831: Douglas Adams — American environmental engineer
-        """
-        if not query.strip():
-            return "Query cannot be empty."
+    Example:
+        >>> search_items("English science-fiction novel")
+        Q23163: A Scientific Romance — 1997 novel by Ronald Wright
+        Q627333: The Time Machine — 1895 dystopian science fiction novella by H. G. Wells
+    """
+    return await _search(query, "item", lang, format)
 
-        try:
-            results = await utils.keywordsearch(
-                query,
-                type="item",
-                lang=lang,
-                user_agent=_current_user_agent(),
-            )
-        except requests.RequestException:
-            return "Wikidata is currently unavailable. Please retry shortly."
-        except Exception:
-            return "Unexpected server error while processing the request."
 
-        return _format_search_results(results, "item")
+@mcp.tool()
+async def search_properties(query: str,
+                            lang: str = 'en',
+                            format: Literal["text", "json"] = "text") -> str:
+    """Search Wikidata properties (PIDs) using vector and keyword search.
+    Find relevant Wikidata properties from a natural-language description of the relationship you need. Matches are based on meaning and exact words.
+
+    Args:
+        query: Natural-language description of the concept to find.
+        lang: Language code for the search (default: 'en').
+        format: "text" for one line per result, or "json" for an object mapping each PID to its label and description (default: "text").
+
+    Returns:
+        Newline-separated results in the form:
+            PID: label — description
+
+    Example:
+        >>> search_properties("residence of a person")
+        P551: residence — the place where the person is or has been, resident
+        P276: location — location of the object, structure or event
+    """
+    return await _search(query, "property", lang, format)
+
+
+# Descriptions advertised instead of the ones above when vector search is
+# unavailable, so agents phrase queries as labels rather than concepts.
+_KEYWORD_SEARCH_DESCRIPTIONS = MappingProxyType({
+    "search_items": """Search Wikidata items (QIDs) with exact text matching.
+    Looks up items by label/alias or literal phrases expected to appear in Wikidata. Useful when you already know the entity you're looking for.
+
+    Args:
+        query: Label, alias, or phrase expected to appear verbatim.
+        lang: Language code for the search (default: 'en').
+        format: "text" for one line per result, or "json" for an object mapping each QID to its label and description (default: "text").
 
+    Returns:
+        Newline-separated results in the form:
+            QID: label — description
 
-    @mcp.tool()
-    async def search_properties(query: str, lang: str = 'en') -> str:
-        """Search Wikidata properties (PIDs) with exact text matching.
-        Looks up properties by label/alias or literal phrases expected to appear in Wikidata. Useful when expected property name is already known.
+    Example:
+        >>> search_items("Douglas Adams")
+        Q42: Douglas Adams — English science fiction writer and humorist
+        Q28421831: Douglas Adams — American environmental engineer
+    """,
+    "search_properties": """Search Wikidata properties (PIDs) with exact text matching.
+    Looks up properties by label/alias or literal phrases expected to appear in Wikidata. Useful when the expected property name is already known.
 
-        Args:
-            query: Label, alias, or phrase expected to appear verbatim.
-            lang: Language code for the search (default: 'en').
+    Args:
+        query: Label, alias, or phrase expected to appear verbatim.
+        lang: Language code for the search (default: 'en').
+        format: "text" for one line per result, or "json" for an object mapping each PID to its label and description (default: "text").
 
-        Returns:
-            Newline-separated lines in the form:
+    Returns:
+        Newline-separated results in the form:
             PID: label — description
 
-        Example:
-            >>> keyword_search_properties("residence")
-            P551: residence — the place where the person is or has been, resident
-            P276: location — location of the object, structure or event
-        """
-        if not query.strip():
-            return "Query cannot be empty."
+    Example:
+        >>> search_properties("residence")
+        P551: residence — the place where the person is or has been, resident
+        P276: location — location of the object, structure or event
+    """,
+})
 
-        try:
-            results = await utils.keywordsearch(
-                query,
-                type="property",
-                lang=lang,
-                user_agent=_current_user_agent(),
-            )
-        except requests.RequestException:
-            return "Wikidata is currently unavailable. Please retry shortly."
-        except Exception:
-            return "Unexpected server error while processing the request."
+def _use_keyword_search_descriptions() -> None:
+    for tool in (search_items, search_properties):
+        tool.description = _KEYWORD_SEARCH_DESCRIPTIONS[tool.name]
 
-        return _format_search_results(results, "property")
+if not WD_VECTORDB_API_SECRET:
+    _use_keyword_search_descriptions()
 
 
 @mcp.tool()
@@ -224,7 +289,7 @@ async def get_statements(entity_id: str,
     """Return the direct statements (property-value pairs) of an entity. Expose all direct graph connections of a Wikidata entity to inspect its factual context. This tool does not include deprecated values, qualifiers, or references (use `get_statement_values` instead).
 
     Args:
-        entity_id: A QID or PID such as "Q42" or "P31".
+        entity_id: A QID or PID such as "Q42" or "P31". Several IDs can be given separated by commas.
         include_external_ids: Whether to include external identifiers linking to other databases.
         lang: Language code for labels and descriptions (default: 'en').
 
@@ -238,27 +303,36 @@ async def get_statements(entity_id: str,
         Douglas Adams (Q42): occupation (P106): novelist (Q6625963)
     """
 
-    if not entity_id.strip():
+    entity_ids = _split_ids(entity_id)
+    if not entity_ids:
         return "Entity ID cannot be empty."
+    error = _invalid_entity_id(entity_ids)
+    if error:
+        return error
 
+    user_agent = current_user_agent.get()
     try:
-        result = await utils.get_entities_triplets(
-            [entity_id],
-            external_ids=include_external_ids,
-            all_ranks=False,
-            qualifiers=False,
-            lang=lang,
-            user_agent=_current_user_agent(),
-        )
-    except requests.RequestException:
+        # The batcher merges these into a single textifier request.
+        results = await asyncio.gather(*(
+            _statements_batcher.submit(
+                eid,
+                external_ids=include_external_ids,
+                all_ranks=False,
+                qualifiers=False,
+                lang=lang,
+                user_agent=user_agent,
+            )
+            for eid in entity_ids
+        ))
+    except httpx.HTTPError:
         return "Wikidata is currently unavailable. Please retry shortly."
     except Exception:
         return "Unexpected server error while processing the request."
 
-    if not result:
-        return f"Entity {entity_id} not found"
-
-    return result.get(entity_id, f"Entity {entity_id} not found")
+    return "\n\n".join(
+        result if result else f"Entity {eid} not found"
+        for eid, result in zip(entity_ids, results)
+    )
 
 
 @mcp.tool()
@@ -268,8 +342,8 @@ async def get_statement_values(entity_id: str,
     """Get all values for a specific statement (entity-property pair), including all qualifiers, ranks and references. Returns complete statement information including deprecated values and reference data that are excluded from `get_statements`.
 
     Args:
-        entity_id: A QID or PID such as "Q42" or "P31".
-        property_id: A PID such as "P31".
+        entity_id: A QID or PID such as "Q42" or "P31". Several IDs can be given separated by commas.
+        property_id: A PID such as "P31". Several PIDs can be given separated by commas.
         lang: Language code for labels and descriptions (default: 'en').
 
     Returns:
@@ -292,50 +366,62 @@ async def get_statement_values(entity_id: str,
             - Who's Who UK ID (P4789): U4994
     """
 
-    if not entity_id.strip():
+    entity_ids = _split_ids(entity_id)
+    property_ids = _split_ids(property_id)
+    if not entity_ids:
         return "Entity ID cannot be empty."
-    if not property_id.strip():
+    if not property_ids:
         return "Property ID cannot be empty."
+    error = _invalid_entity_id(entity_ids) or _invalid_property_id(property_ids)
+    if error:
+        return error
 
     try:
         result = await utils.get_triplet_values(
-            [entity_id],
-            pid=[property_id],
+            entity_ids,
+            pid=property_ids,
             external_ids=True,
             references=True,
             all_ranks=True,
             qualifiers=True,
             lang=lang,
-            user_agent=_current_user_agent(),
+            user_agent=current_user_agent.get(),
         )
-    except requests.RequestException:
+    except httpx.HTTPError:
         return "Wikidata is currently unavailable. Please retry shortly."
     except Exception:
         return "Unexpected server error while processing the request."
 
-    if not result:
-        return f"Entity {entity_id} not found"
-
-    entity = result.get(entity_id)
-    if not entity:
-        return f"Entity {entity_id} not found"
-
-    text = utils.triplet_values_to_string(entity_id, property_id, entity)
-    if not text:
-        return f"No statement found for {entity_id} with property {property_id}"
-    return text
+    result = result or {}
+    pids = ", ".join(property_ids)
+    # Only claims without a PID of their own fall back to this one.
+    fallback_pid = property_ids[0] if len(property_ids) == 1 else None
+    parts = []
+    for eid in entity_ids:
+        entity = result.get(eid)
+        if not entity:
+            parts.append(f"Entity {eid} not found")
+            continue
+        # The response only holds statements for the requested properties.
+        text = utils.triplet_values_to_string(eid, fallback_pid, entity)
+        if not text:
+            text = f"No statement found for {eid} with property {pids}"
+        parts.append(text)
+    return "\n\n".join(parts)
 
 
 @mcp.tool()
 async def get_instance_and_subclass_hierarchy(entity_id: str,
                             max_depth: int = 5,
-                            lang: str = 'en') -> str:
+                            lang: str = 'en',
+                            max_nodes: int = utils.HIERARCHY_MAX_NODES) -> str:
     """Expose the hierarchical context of a Wikidata entity to inspect its ontological placement. This tool retrieves hierarchical relationships based on "instance of" (P31) and "subclass of" (P279) properties.
 
     Args:
         entity_id: A QID or PID such as "Q42" or "P31".
         max_depth: Maximum depth of the hierarchy to retrieve. Defaults to 5.
         lang: Language code for labels and descriptions (default: 'en').
+        max_nodes: Maximum number of entities to include. Parents cut off by this limit are shown as "...truncated". Must be at least 1; defaults to the server's maximum.
 
     Returns:
         JSON-formatted hierarchical data showing the entity's placement in the ontology.
@@ -357,12 +443,22 @@ async def get_instance_and_subclass_hierarchy(entity_id: str,
         }
     """
 
-    if not entity_id.strip():
+    entity_id = entity_id.strip()
+    if not entity_id:
         return "Entity ID cannot be empty."
+    error = _invalid_entity_id([entity_id])
+    if error:
+        return error
+    # max_nodes is part of the cache key, so keep it within a fixed range.
+    if not 1 <= max_nodes <= utils.HIERARCHY_MAX_NODES:
+        return f"max_nodes must be between 1 and {utils.HIERARCHY_MAX_NODES}."
 
     try:
-        result = await utils.get_hierarchy_data(entity_id, max_depth, lang=lang)
-    except requests.RequestException:
+        result = await utils.get_hierarchy_data(entity_id,
+                                                max_depth,
+                                                lang=lang,
+                                                max_nodes=max_nodes)
+    except httpx.HTTPError:
         return "Wikidata is currently unavailable. Please retry shortly."
     except Exception:
         return "Unexpected server error while processing the request."
@@ -370,9 +466,18 @@ async def get_instance_and_subclass_hierarchy(entity_id: str,
     if not result or entity_id not in result:
         return f"Entity {entity_id} not found"
 
+    def render(data: dict) -> str:
+        tree = utils.hierarchy_to_json(entity_id, data, level=max_depth)
+        try:
+            return orjson.dumps(tree, option=orjson.OPT_INDENT_2).decode()
+        except orjson.JSONEncodeError:
+            # orjson stops at 255 nesting levels, reached by cycles in
+            # deep subclass chains; the stdlib encoder has no such limit.
+            return json.dumps(tree, indent=2, ensure_ascii=False)
+
     try:
-        result = utils.hierarchy_to_json(entity_id, result, level=max_depth)
-        return json.dumps(result, indent=2)
+        # Deep trees take a while to build and dump; keep that off the event loop.
+        return await asyncio.to_thread(render, result)
     except Exception:
         return "Unexpected server error while processing the request."
 
@@ -428,28 +533,27 @@ async def execute_sparql(sparql: str, K: int = 10) -> str:
         result = await utils.execute_sparql(
             sparql,
             K=K,
-            user_agent=_current_user_agent(),
+            user_agent=current_user_agent.get(),
         )
     except ValueError as e:
         return str(e)
-    except requests.RequestException:
+    except httpx.HTTPError:
         return "Wikidata is currently unavailable. Please retry shortly."
     except Exception:
         return "Unexpected server error while processing the request."
 
     try:
-        return result.to_csv(sep=';', index=True, header=True)
+        return await asyncio.to_thread(_results_to_csv, *result)
     except Exception:
         return "Unexpected server error while processing the request."
 
 
-@mcp.prompt
-def explore_wikidata(query: str) -> str:
-    """Instruct the model to explore Wikidata without assumptions."""
-
-    return f"""
+# Built once at import; only the user's query changes between calls.
+_EXPLORE_PROMPT_PREFIX = """
     You are an assistant that explores Wikidata on behalf of the user.
-    The user's request is: '{query}'.
+    The user's request is: '"""
+
+_EXPLORE_PROMPT_SUFFIX = """'.
 
     IMPORTANT: All QIDs (items) and PIDs (properties) are randomly shuffled, so you cannot rely on any prior knowledge of Wikidata identifiers or schema. The only way to retrieve information is by using the provided tools.
 
@@ -473,12 +577,19 @@ def explore_wikidata(query: str) -> str:
         - If the results are not as expected, iteratively refine the SPARQL query and repeat until the results are satisfactory.
     """
 
+@mcp.prompt
+def explore_wikidata(query: str) -> str:
+    """Instruct the model to explore Wikidata without assumptions."""
+
+    return f"{_EXPLORE_PROMPT_PREFIX}{query}{_EXPLORE_PROMPT_SUFFIX}"
+
 # Canonical registry used by HTTP wrappers and docs route generation.
-TOOL_LIST = {
+# Read-only, since routes are generated from it once at import.
+TOOL_LIST = MappingProxyType({
     "search_items": search_items,
     "search_properties": search_properties,
     "get_statements": get_statements,
     "get_statement_values": get_statement_values,
     "get_instance_and_subclass_hierarchy": get_instance_and_subclass_hierarchy,
     "execute_sparql": execute_sparql,
-}
+})
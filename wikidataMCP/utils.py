@@ -1,8 +1,13 @@
-from urllib.parse import urlencode
-import requests
-import pandas as pd
+import asyncio
+import contextlib
+import functools
+import httpx
+import orjson
 import re
 import os
+import random
+
+from wikidataMCP import batch, cache, ratelimit
 
 VECTOR_SEARCH_URI = os.environ.get("VECTOR_SEARCH_URI", "https://wd-vectordb.wmcloud.org")
 TEXTIFER_URI = os.environ.get("TEXTIFER_URI", "https://wd-textify.wmcloud.org")
@@ -10,9 +15,176 @@ WD_API_URI = os.environ.get("WD_API_URI", "https://www.wikidata.org/w/api.php")
 WD_QUERY_URI = os.environ.get("WD_QUERY_URI", "https://query.wikidata.org/sparql")
 USER_AGENT = os.environ.get("USER_AGENT", "Wikidata MCP Client (embedding@wikimedia.de)")
 
+ENTITY_URI_PREFIX = "http://www.wikidata.org/entity/"
+ENTITY_ID_RE = re.compile(r"[A-Z]\d+")
+
 REQUEST_TIMEOUT_SECONDS = float(os.environ.get("REQUEST_TIMEOUT_SECONDS", "15"))
+# Fail fast on unreachable hosts, whatever the read timeout.
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+# The query service stops queries after 60 seconds.
+SPARQL_TIMEOUT_SECONDS = float(os.environ.get("SPARQL_TIMEOUT_SECONDS", "60"))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", "50"))
+# Agents often think for a while between tool calls; keep idle connections warm.
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY_SECONDS", "75"))
+HTTP_CONNECT_RETRIES = int(os.environ.get("HTTP_CONNECT_RETRIES", "2"))
+HTTP_MAX_ATTEMPTS = int(os.environ.get("HTTP_MAX_ATTEMPTS", "3"))
+HTTP_BACKOFF_SECONDS = float(os.environ.get("HTTP_BACKOFF_SECONDS", "0.5"))
+HTTP_MAX_BACKOFF_SECONDS = float(os.environ.get("HTTP_MAX_BACKOFF_SECONDS", "30"))
+# Label entries are small and unit/property IDs repeat across many statements.
+LABELS_CACHE_MAXSIZE = int(os.environ.get("LABELS_CACHE_MAXSIZE", "50000"))
+# Labels and the class hierarchy rarely change, unlike query results.
+LABELS_CACHE_TTL_SECONDS = float(os.environ.get("LABELS_CACHE_TTL_SECONDS", "3600"))
+HIERARCHY_CACHE_TTL_SECONDS = float(os.environ.get("HIERARCHY_CACHE_TTL_SECONDS", "3600"))
+# The query service itself caches results for 5 minutes.
+SPARQL_CACHE_TTL_SECONDS = float(os.environ.get("SPARQL_CACHE_TTL_SECONDS", "300"))
+# Longer queries are sent with POST instead of in the URL.
+SPARQL_MAX_GET_LENGTH = int(os.environ.get("SPARQL_MAX_GET_LENGTH", "2000"))
+# Hierarchies of well-connected entities grow quickly with depth.
+HIERARCHY_MAX_NODES = int(os.environ.get("HIERARCHY_MAX_NODES", "500"))
+HIERARCHY_NODES_CACHE_MAXSIZE = int(os.environ.get("HIERARCHY_NODES_CACHE_MAXSIZE", "10000"))
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# A failed query may have been expensive; only retry when explicitly throttled.
+SPARQL_RETRY_STATUS_CODES = frozenset({429})
+# Upper bound on parallel Wikidata API requests, per API etiquette.
+WD_API_MAX_CONCURRENCY = int(os.environ.get("WD_API_MAX_CONCURRENCY", "8"))
+# The query service allows 5 concurrent queries per client IP.
+WD_QUERY_MAX_CONCURRENCY = int(os.environ.get("WD_QUERY_MAX_CONCURRENCY", "5"))
+# Requests per second sent to the Wikidata API and the SPARQL endpoint.
+WD_API_MAX_RATE = float(os.environ.get("WD_API_MAX_RATE", "30"))
+WD_QUERY_MAX_RATE = float(os.environ.get("WD_QUERY_MAX_RATE", "5"))
+# The textifier and vector DB are small Wikimedia Cloud services, keep them from being flooded.
+TEXTIFIER_MAX_CONCURRENCY = int(os.environ.get("TEXTIFIER_MAX_CONCURRENCY", "4"))
+VECTOR_SEARCH_MAX_CONCURRENCY = int(os.environ.get("VECTOR_SEARCH_MAX_CONCURRENCY", "4"))
+
+_client: httpx.AsyncClient | None = None
+
+# Labels and descriptions, cached per (entity ID, language).
+_labels_cache = cache.TTLCache(maxsize=LABELS_CACHE_MAXSIZE,
+                               ttl=LABELS_CACHE_TTL_SECONDS)
+_labels_inflight = {}
+# Hierarchy data per (entity ID, language), stored with the depth it was fetched to.
+_hierarchy_cache = cache.TTLCache(ttl=HIERARCHY_CACHE_TTL_SECONDS)
+# Direct P31/P279 parents and labels per (entity ID, language), shared across hierarchies.
+_hierarchy_nodes_cache = cache.TTLCache(maxsize=HIERARCHY_NODES_CACHE_MAXSIZE,
+                                        ttl=HIERARCHY_CACHE_TTL_SECONDS)
+_wd_api_semaphore = asyncio.Semaphore(WD_API_MAX_CONCURRENCY)
+_wd_api_limiter = ratelimit.RateLimiter(WD_API_MAX_RATE)
+_wd_query_semaphore = asyncio.Semaphore(WD_QUERY_MAX_CONCURRENCY)
+_wd_query_limiter = ratelimit.RateLimiter(WD_QUERY_MAX_RATE)
+_textifier_semaphore = asyncio.Semaphore(TEXTIFIER_MAX_CONCURRENCY)
+_vector_search_semaphore = asyncio.Semaphore(VECTOR_SEARCH_MAX_CONCURRENCY)
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the HTTP client shared by all upstream calls, creating it on first use.
+
+    Reusing one client keeps connections to Wikidata and the Wikimedia Cloud services alive between tool calls.
+
+    Returns:
+        httpx.AsyncClient: The shared client.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(REQUEST_TIMEOUT_SECONDS,
+                                  connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+            # Retries only cover failed connection attempts, never sent requests.
+            # HTTP/2 lets concurrent requests to one host share a connection.
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=HTTP_CONNECT_RETRIES,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+                ),
+            ),
+            follow_redirects=True,
+        )
+    return _client
 
 
+async def close_client() -> None:
+    """
+    Closes the shared HTTP client and its pooled connections.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def http_request(method: str,
+                       url: str,
+                       limiter: ratelimit.RateLimiter | None = None,
+                       semaphore: asyncio.Semaphore | None = None,
+                       retry_statuses: frozenset = RETRY_STATUS_CODES,
+                       **kwargs) -> httpx.Response:
+    """
+    Sends a request with the shared client, retrying throttled and transient server errors.
+
+    Responses with a status in `retry_statuses` are retried up to HTTP_MAX_ATTEMPTS times in total, waiting for the Retry-After header if present or an exponential backoff with jitter otherwise.
+    A Retry-After longer than HTTP_MAX_BACKOFF_SECONDS is not waited for, the response is returned instead.
+
+    Args:
+        method (str): The HTTP method, e.g. "GET" or "POST". Only use idempotent requests, they may be sent more than once.
+        url (str): The URL to request.
+        limiter (ratelimit.RateLimiter, optional): Limiter to pass before each attempt. Defaults to None.
+        semaphore (asyncio.Semaphore, optional): Held during each attempt, but not while waiting to retry. Defaults to None.
+        retry_statuses (frozenset, optional): Status codes worth retrying. Defaults to RETRY_STATUS_CODES.
+        **kwargs: Keyword arguments forwarded to httpx.AsyncClient.request, e.g. params and headers.
+
+    Returns:
+        httpx.Response: The last response received.
+    """
+    for attempt in range(HTTP_MAX_ATTEMPTS):
+        async with semaphore or contextlib.nullcontext():
+            async with limiter or contextlib.nullcontext():
+                response = await get_client().request(method, url, **kwargs)
+
+        if response.status_code not in retry_statuses or attempt == HTTP_MAX_ATTEMPTS - 1:
+            return response
+
+        try:
+            delay = float(response.headers.get("Retry-After", 0))
+        except ValueError:
+            delay = 0
+        if delay > HTTP_MAX_BACKOFF_SECONDS:
+            # Retrying earlier than asked risks getting blocked.
+            return response
+        delay = delay or min(HTTP_MAX_BACKOFF_SECONDS, HTTP_BACKOFF_SECONDS * 2 ** attempt)
+        await asyncio.sleep(delay + random.random() * 0.2)
+    return response
+
+
+async def http_get(url: str,
+                   limiter: ratelimit.RateLimiter | None = None,
+                   semaphore: asyncio.Semaphore | None = None,
+                   **kwargs) -> httpx.Response:
+    """
+    Sends a GET request with `http_request`.
+
+    Args:
+        url (str): The URL to request.
+        limiter (ratelimit.RateLimiter, optional): Limiter to pass before each attempt. Defaults to None.
+        semaphore (asyncio.Semaphore, optional): Held during each attempt, but not while waiting to retry. Defaults to None.
+        **kwargs: Keyword arguments forwarded to httpx.AsyncClient.request, e.g. params and headers.
+
+    Returns:
+        httpx.Response: The last response received.
+    """
+    return await http_request("GET", url, limiter=limiter, semaphore=semaphore, **kwargs)
+
+
+@cache.ttl_cache(
+    # Search is case-insensitive, so differently cased queries share an entry.
+    key=lambda query, type="item", limit=10, lang="en", user_agent="": (
+        query.strip().lower(), type, limit, lang
+    ),
+    stale_on=(httpx.HTTPError,),
+)
 async def keywordsearch(query: str,
                         type: str = "item",
                         limit: int = 10,
@@ -38,32 +210,31 @@ async def keywordsearch(query: str,
         "format": "json",
         "origin": "*",
     }
-    response = requests.get(
+    response = await http_get(
         WD_API_URI,
+        limiter=_wd_api_limiter,
+        semaphore=_wd_api_semaphore,
         params=params,
         headers={"User-Agent": f"{USER_AGENT} ({user_agent})"},
-        timeout=REQUEST_TIMEOUT_SECONDS,
     )
     response.raise_for_status()
 
-    response_dict_search = response.json().get("search", {})
+    response_dict_search = orjson.loads(response.content).get("search", {})
 
-    item_dict = {
-        x["id"]:
-        {
-            "label": x.get("display", {})\
-                        .get("label", {})\
-                        .get("value", ""),
-            "description": x.get("display", {})\
-                            .get("description", {})\
-                            .get("value", ""),
+    def _extract(x):
+        display = x.get("display") or {}
+        label = display.get("label")
+        description = display.get("description")
+        return {
+            "label": label.get("value", "") if label else "",
+            "description": description.get("value", "") if description else "",
         }
-        for x in response_dict_search
-    }
+
+    item_dict = {x["id"]: _extract(x) for x in response_dict_search}
     return item_dict
 
 
-def vectorsearch_verify_apikey(x_api_key: str) -> bool:
+async def vectorsearch_verify_apikey(x_api_key: str) -> bool:
     """
     Verifies if the provided API key is valid for vector search.
 
@@ -77,13 +248,12 @@ def vectorsearch_verify_apikey(x_api_key: str) -> bool:
         if not x_api_key:
             x_api_key = ''
 
-        response = requests.get(
+        response = await get_client().get(
             f"{VECTOR_SEARCH_URI}/item/query/?query=",
             headers={
                 "x-api-secret": x_api_key,
                 "User-Agent": USER_AGENT,
             },
-            timeout=REQUEST_TIMEOUT_SECONDS,
         )
         return response.status_code != 401
     except:
@@ -111,41 +281,61 @@ async def vectorsearch(query: str,
 
     id_name = "QID" if type == "item" else "PID"
 
-    response = requests.get(
-        f"{VECTOR_SEARCH_URI}/{type}/query/?query={query}&k={limit}",
+    response = await http_get(
+        f"{VECTOR_SEARCH_URI}/{type}/query/",
+        semaphore=_vector_search_semaphore,
+        params={"query": query, "k": limit},
         headers={
             "x-api-secret": x_api_key,
             "User-Agent": f"{USER_AGENT} ({user_agent})"
         },
-        timeout=REQUEST_TIMEOUT_SECONDS,
     )
     response.raise_for_status()
 
-    vectordb_result = response.json()
+    vectordb_result = orjson.loads(response.content)
 
     ids = [x[id_name] for x in vectordb_result]
     entities_dict = await get_entities_labels_and_descriptions(ids, lang=lang)
     return entities_dict
 
+@cache.ttl_cache(
+    ttl=SPARQL_CACHE_TTL_SECONDS,
+    key=lambda sparql_query, K=10, user_agent="": (sparql_query, K),
+    stale_on=(httpx.HTTPError,),
+)
 async def execute_sparql(sparql_query: str,
                          K: int = 10,
-                         user_agent = '') -> pd.DataFrame:
+                         user_agent = '') -> tuple[list[str], list[tuple]]:
     """
     Execute a SPARQL query on Wikidata.
 
     Args:
         sparql_query (str): The SPARQL query to execute.
+        K (int, optional): Maximum number of rows to return. Defaults to 10.
 
     Returns:
-        pandas.DataFrame: A cleaned dataframe of the results.
+        tuple: The variable names of the query and a list of result rows, with entity URIs shortened to their IDs and None for unbound values.
     """
-    params = urlencode({"query": sparql_query, "format": "json"})
-    encoded_url = WD_QUERY_URI + "?" + params
-
-    result = requests.get(
-        encoded_url,
-        headers={"User-Agent": f"{USER_AGENT} ({user_agent})"},
-        timeout=REQUEST_TIMEOUT_SECONDS,
+    # GET responses are cached by the query service, but long queries
+    # would exceed its URL length limit and have to be sent as a form.
+    if len(sparql_query) > SPARQL_MAX_GET_LENGTH:
+        method, payload = "POST", {"data": {"query": sparql_query, "format": "json"}}
+    else:
+        method, payload = "GET", {"params": {"query": sparql_query, "format": "json"}}
+
+    result = await http_request(
+        method,
+        WD_QUERY_URI,
+        limiter=_wd_query_limiter,
+        semaphore=_wd_query_semaphore,
+        retry_statuses=SPARQL_RETRY_STATUS_CODES,
+        timeout=httpx.Timeout(SPARQL_TIMEOUT_SECONDS,
+                              connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+        headers={
+            "Accept": "application/sparql-results+json",
+            "User-Agent": f"{USER_AGENT} ({user_agent})",
+        },
+        **payload,
     )
 
     if result.status_code == 400:
@@ -153,54 +343,59 @@ async def execute_sparql(sparql_query: str,
         raise ValueError(error_message)
     result.raise_for_status()
 
-    result_bindings = result.json()["results"]["bindings"]
-    df = pd.json_normalize(result_bindings)
+    payload = orjson.loads(result.content)
+    # Only the first K rows are returned, so skip building the rest.
+    result_bindings = payload["results"]["bindings"][:K]
 
-    value_cols = {
-        c: c.split(".")[0]
-        for c in df.columns if c.endswith(".value")
-    }
-    df = df[list(value_cols)].rename(columns=value_cols)
+    prefix_length = len(ENTITY_URI_PREFIX)
 
-    def shorten(val: str) -> str:
-        if not isinstance(val, str):
-            return val
-        URI_RE = re.compile(r"http://www\.wikidata\.org/entity/([A-Z]\d+)$")
-        match = URI_RE.match(val)
-        return match.group(1) if match else val
+    def shorten(value: str) -> str:
+        # Most values are literals, skip the regex for them.
+        if not value.startswith(ENTITY_URI_PREFIX):
+            return value
+        match = ENTITY_ID_RE.fullmatch(value, prefix_length)
+        return match.group() if match else value
 
-    df = df.applymap(shorten)
-    df = df.head(K)
-    return df
+    columns = payload["head"]["vars"]
+    rows = [
+        tuple(
+            shorten(binding[var]["value"]) if var in binding else None
+            for var in columns
+        )
+        for binding in result_bindings
+    ]
+    return columns, rows
 
-def get_lang_specific(data, langs=['en', 'mul']) -> str:
+def get_lang_specific(data, langs=('en', 'mul')) -> str:
     for lang in langs:
-        if lang in data:
-            if data[lang].get('value'):
-                return data[lang].get('value')
+        entry = data.get(lang)
+        if entry:
+            value = entry.get('value')
+            if value:
+                return value
     return ''
 
 
-async def get_entities_labels_and_descriptions(ids, lang='en') -> dict:
+def is_per_key_error(e: Exception) -> bool:
     """
-    Fetches labels and descriptions for a list of Wikidata entity IDs.
+    Tells whether a failed batched request may have been caused by a single ID.
+
+    Client errors other than throttling and errors raised while reading the response qualify.
+    Throttling, server errors and network failures do not depend on the IDs requested.
 
     Args:
-        ids (list[str]): List of Wikidata entity IDs (QIDs or PIDs).
-        lang (str, optional): Language code available on Wikidata. Default to en.
+        e (Exception): The exception raised by the batched request.
 
     Returns:
-        dict: A dictionary mapping entity IDs to WikidataEntity objects with labels and descriptions.
+        bool: True if retrying the IDs one by one can isolate the failure.
     """
-    if not ids:
-        return {}
-
-    entities_data = {}
+    if isinstance(e, httpx.HTTPStatusError):
+        status = e.response.status_code
+        return 400 <= status < 500 and status != 429
+    return not isinstance(e, httpx.HTTPError)
 
-    # Wikidata API has a limit on the number of IDs per request,
-    # typically 50 for wbgetentities.
-    for chunk_idx in range(0, len(ids), 50):
-        ids_chunk = ids[chunk_idx:chunk_idx+50]
+async def _fetch_labels_and_descriptions(ids: list[str], lang: str) -> dict:
+    async def fetch_chunk(ids_chunk):
         params = {
             "action": "wbgetentities",
             "ids": "|".join(ids_chunk),
@@ -209,26 +404,95 @@ async def get_entities_labels_and_descriptions(ids, lang='en') -> dict:
             "format": "json",
             "origin": "*",
         }
-        response = requests.get(
+        response = await http_get(
             WD_API_URI,
+            limiter=_wd_api_limiter,
+            semaphore=_wd_api_semaphore,
             params=params,
             headers={"User-Agent": USER_AGENT},
-            timeout=REQUEST_TIMEOUT_SECONDS,
         )
         response.raise_for_status()
-        chunk_data = response.json().get("entities", {})
-        entities_data = entities_data | chunk_data
+        return orjson.loads(response.content).get("entities", {})
 
+    # Wikidata API has a limit on the number of IDs per request,
+    # typically 50 for wbgetentities.
+    chunks = await asyncio.gather(*(
+        fetch_chunk(ids[chunk_idx:chunk_idx+50])
+        for chunk_idx in range(0, len(ids), 50)
+    ))
+
+    entities_data = {}
+    for chunk_data in chunks:
+        entities_data.update(chunk_data)
+
+    langs = (lang, 'mul', 'en')
     entities_dict = {
         id:
         {
-            "label": get_lang_specific(val['labels'],
-                                        langs=[lang, 'mul', 'en']),
-            "description": get_lang_specific(val['descriptions'],
-                                        langs=[lang, 'mul', 'en'])
+            "label": get_lang_specific(val['labels'], langs=langs),
+            "description": get_lang_specific(val['descriptions'], langs=langs)
         }
         for id, val in entities_data.items()
     }
+    for id, value in entities_dict.items():
+        _labels_cache.set((id, lang), value)
+    return entities_dict
+
+
+# Concurrent label lookups are merged into shared wbgetentities requests.
+_labels_batcher = batch.MicroBatcher(_fetch_labels_and_descriptions,
+                                     split_on=is_per_key_error)
+
+
+def _labels_done(key, task) -> None:
+    if _labels_inflight.get(key) is task:
+        del _labels_inflight[key]
+    # Mark a failure as retrieved even if no caller is left to await it.
+    if not task.cancelled():
+        task.exception()
+
+
+async def get_entities_labels_and_descriptions(ids, lang='en') -> dict:
+    """
+    Fetches labels and descriptions for a list of Wikidata entity IDs.
+
+    Args:
+        ids (list[str]): List of Wikidata entity IDs (QIDs or PIDs).
+        lang (str, optional): Language code available on Wikidata. Default to en.
+
+    Returns:
+        dict: A dictionary mapping entity IDs to WikidataEntity objects with labels and descriptions.
+    """
+    if not ids:
+        return {}
+
+    entities_dict = {}
+    pending = {}
+    for id in dict.fromkeys(ids):
+        value = _labels_cache.get((id, lang))
+        if value is not None:
+            entities_dict[id] = value
+            continue
+
+        # IDs already being fetched by another call share that request.
+        task = _labels_inflight.get((id, lang))
+        if task is None:
+            task = asyncio.ensure_future(_labels_batcher.submit(id, lang=lang))
+            _labels_inflight[(id, lang)] = task
+            task.add_done_callback(functools.partial(_labels_done, (id, lang)))
+        pending[id] = task
+
+    if not pending:
+        return entities_dict
+
+    values = await asyncio.gather(*(asyncio.shield(t) for t in pending.values()))
+    fetched = dict(zip(pending, values))
+
+    entities_dict = {
+        id: entities_dict[id] if id in entities_dict else fetched[id]
+        for id in dict.fromkeys(ids)
+        if id in entities_dict or fetched[id] is not None
+    }
     return entities_dict
 
 
@@ -253,22 +517,23 @@ async def get_entities_triplets(ids: list[str],
     if not ids:
         return {}
 
+    # Drop repeated IDs, keeping their first-seen order.
     params = {
-        "id": ','.join(ids),
+        "id": ','.join(dict.fromkeys(ids)),
         "external_ids": external_ids,
         "all_ranks": all_ranks,
         "qualifiers": qualifiers,
         "lang": lang,
         "format": "triplet",
     }
-    response = requests.get(
+    response = await http_get(
         TEXTIFER_URI,
+        semaphore=_textifier_semaphore,
         params=params,
         headers={"User-Agent": f"{USER_AGENT} ({user_agent})"},
-        timeout=REQUEST_TIMEOUT_SECONDS,
     )
     response.raise_for_status()
-    info = response.json()
+    info = orjson.loads(response.content)
 
     return info
 
@@ -296,14 +561,15 @@ async def get_claims(qid: str,
         "format": "json",
         "origin": "*",
     }
-    response = requests.get(
+    response = await http_get(
         WD_API_URI,
+        limiter=_wd_api_limiter,
+        semaphore=_wd_api_semaphore,
         params=params,
         headers={"User-Agent": USER_AGENT},
-        timeout=REQUEST_TIMEOUT_SECONDS,
     )
     response.raise_for_status()
-    entities_data = response.json().get("claims", {})
+    entities_data = orjson.loads(response.content).get("claims", {})
 
     claim_values = []
     for claim in entities_data.get(pid, []):
@@ -339,86 +605,142 @@ async def get_triplet_values(ids: list[str],
         return {}
 
     params = {
-        "id": ','.join(ids),
+        "id": ','.join(dict.fromkeys(ids)),
         "external_ids": external_ids,
         "all_ranks": all_ranks,
         "references": references,
         "qualifiers": qualifiers,
         "lang": lang,
-        "pid": ','.join(pid),
+        "pid": ','.join(dict.fromkeys(pid)),
         "format": "json",
     }
-    response = requests.get(
+    response = await http_get(
         TEXTIFER_URI,
+        semaphore=_textifier_semaphore,
         params=params,
         headers={"User-Agent": f"{USER_AGENT} ({user_agent})"},
-        timeout=REQUEST_TIMEOUT_SECONDS,
     )
     response.raise_for_status()
-    info = response.json()
+    info = orjson.loads(response.content)
 
     return info
 
+def _parse_hierarchy_node(entity: dict) -> dict:
+    """
+    Extracts the direct parents of an entity from its P31 and P279 triplet values.
+
+    Args:
+        entity (dict): The triplet values of the entity, as returned by get_triplet_values.
+
+    Returns:
+        dict: The 'instanceof' and 'subclassof' parent IDs, the entity 'label', and the 'value_labels' of its parents.
+    """
+    # One pass over the claims, keeping the first claim of each property.
+    values = {}
+    for c in entity['claims']:
+        if c['PID'] in ('P31', 'P279') and c['PID'] not in values:
+            values[c['PID']] = [v['value'] for v in c['values']]
+    instanceof = values.get('P31', [])
+    subclassof = values.get('P279', [])
+
+    value_labels = {}
+    for v in instanceof + subclassof:
+        if 'QID' in v:
+            value_labels[v['QID']] = v.get('label', '')
+        elif 'PID' in v:
+            value_labels[v['PID']] = v.get('label', '')
+
+    return {
+        'instanceof': [v.get('QID', v.get('PID')) for v in instanceof],
+        'subclassof': [v.get('QID', v.get('PID')) for v in subclassof],
+        'label': entity.get('label', ''),
+        'value_labels': value_labels,
+    }
+
 async def get_hierarchy_data(qid: str,
                        max_depth: int = 5,
-                       lang: str = 'en') -> dict:
+                       lang: str = 'en',
+                       max_nodes: int = HIERARCHY_MAX_NODES) -> dict:
     """
     Fetches hierarchical data for a given Wikidata QID.
 
+    Entities are fetched level by level until `max_nodes` entities are known.
+    Entities whose parents were left out because of that budget are marked
+    with 'truncated': True.
+
     Args:
         qid (str): The Wikidata QID to fetch hierarchical data for.
         max_depth (int, optional): Maximum depth of the hierarchy to retrieve. Defaults to 5.
         lang (str, optional): Language code available on Wikidata. Default to en.
+        max_nodes (int, optional): Maximum number of entities to fetch. Defaults to HIERARCHY_MAX_NODES.
 
     Returns:
         dict: A dictionary representing the hierarchical data.
     """
+    # A hierarchy fetched to a greater depth also answers shallower requests.
+    cached = _hierarchy_cache.get((qid, lang, max_nodes))
+    if cached is not None and cached[0] >= max_depth:
+        return cached[1]
+
+    root_qid = qid
     qids = [qid]
     hierarchical_data = {}
     label_data = {}
     level = 0
 
-    while qids and level <= max_depth:
-        new_qids = set()
-
-        current_data = await get_triplet_values(qids,
-                                          pid=['P31', 'P279'],
-                                          lang=lang)
+    exhausted = False
+    while qids and level <= max_depth and not exhausted:
+        budget = max_nodes - len(hierarchical_data)
+        if len(qids) > budget:
+            dropped = set(qids[budget:])
+            qids = qids[:budget]
+            for node in hierarchical_data.values():
+                if dropped.intersection(node['instanceof'] + node['subclassof']):
+                    node['truncated'] = True
+            exhausted = True
+            if not qids:
+                break
+
+        new_qids = {}
+
+        # Upper ontology classes are shared by most hierarchies,
+        # only fetch the nodes that are not cached yet.
+        nodes = {}
+        missing = []
+        for qid in qids:
+            node = _hierarchy_nodes_cache.get((qid, lang))
+            if node is None:
+                missing.append(qid)
+            else:
+                nodes[qid] = node
+
+        if missing:
+            current_data = await get_triplet_values(missing,
+                                              pid=['P31', 'P279'],
+                                              lang=lang)
+            for qid in missing:
+                if qid in current_data:
+                    nodes[qid] = _parse_hierarchy_node(current_data[qid])
+                    _hierarchy_nodes_cache.set((qid, lang), nodes[qid])
 
         for qid in qids:
-            if qid not in current_data:
+            if qid not in nodes:
                 continue
-
-            instanceof = [c['values'] \
-                          for c in current_data[qid]['claims'] \
-                            if c['PID'] == 'P31']
-            instanceof = [v['value'] for v in instanceof[0]] if instanceof else []
-
-            subclassof = [c['values'] \
-                          for c in current_data[qid]['claims'] \
-                            if c['PID'] == 'P279']
-            subclassof = [v['value'] for v in subclassof[0]] if subclassof else []
-
-            instanceof_qids = [v.get('QID', v.get('PID')) for v in instanceof]
-            subclassof_qids = [v.get('QID', v.get('PID')) for v in subclassof]
+            node = nodes[qid]
 
             hierarchical_data[qid] = {
-                'instanceof': instanceof_qids,
-                'subclassof': subclassof_qids
+                'instanceof': node['instanceof'],
+                'subclassof': node['subclassof']
             }
 
-            new_qids = new_qids | \
-                set(instanceof_qids) | \
-                set(subclassof_qids)
+            # Keep discovery order so the budget cuts the same entities every time.
+            new_qids.update(dict.fromkeys(node['instanceof'] + node['subclassof']))
 
-            for v in instanceof + subclassof:
-                if 'QID' in v:
-                    label_data[v['QID']] = v.get('label', '')
-                elif 'PID' in v:
-                    label_data[v['PID']] = v.get('label', '')
-            label_data[qid] = current_data[qid].get('label', '')
+            label_data.update(node['value_labels'])
+            label_data[qid] = node['label']
 
-        qids = new_qids - set(hierarchical_data.keys()) - set({None})
+        qids = [q for q in new_qids
+                if q is not None and q not in hierarchical_data]
         level += 1
 
     qids = list(hierarchical_data.keys())
@@ -426,55 +748,74 @@ async def get_hierarchy_data(qid: str,
         if qid in hierarchical_data:
             hierarchical_data[qid]['label'] = label
 
+    _hierarchy_cache.set((root_qid, lang, max_nodes), (max_depth, hierarchical_data))
     return hierarchical_data
 
 def hierarchy_to_json(qid, data, level=5):
-    if level <= 0:
-        return f"{data[qid]['label']} ({qid})"
+    # Classes are often reached along several paths; build each
+    # (entity, remaining depth) subtree once and share it.
+    subtrees = {}
+
+    def build(qid, level):
+        key = (qid, level)
+        if key in subtrees:
+            return subtrees[key]
+
+        if level <= 0:
+            tree = f"{data[qid]['label']} ({qid})"
+        else:
+            def children(qids):
+                values = [
+                    build(i_qid, level-1) \
+                        for i_qid in qids \
+                            if (i_qid in data)
+                ]
+                if data[qid].get('truncated') and len(values) < len(qids):
+                    values.append("...truncated")
+                return values
+
+            tree = {
+                f"{data[qid]['label']} ({qid})": {
+                    "instance of (P31)": children(data[qid]['instanceof']),
+                    "subclass of (P279)": children(data[qid]['subclassof'])
+                }
+            }
 
-    return {
-        f"{data[qid]['label']} ({qid})": {
-            "instance of (P31)": [
-                hierarchy_to_json(i_qid, data, level-1) \
-                    for i_qid in data[qid]['instanceof'] \
-                        if (i_qid in data)
-            ],
-            "subclass of (P279)": [
-                hierarchy_to_json(i_qid, data, level-1) \
-                    for i_qid in data[qid]['subclassof'] \
-                        if (i_qid in data)
-            ]
-        }
-    }
+        subtrees[key] = tree
+        return tree
+
+    return build(qid, level)
 
 def stringify(value) -> str:
-    if isinstance(value, dict):
-        if 'values' in value:
-            return ", ".join(
-                [stringify(v.get('value', {})) \
-                    for v in value['values']]
-            )
-        if 'value' in value:
-            return stringify(value['value'])
-        if 'string' in value:
-            return value['string']
-        if 'QID' in value:
-            return f"{value.get('label')} ({value.get('QID')})"
-        if 'PID' in value:
-            return f"{value.get('label')} ({value.get('PID')})"
-        if 'amount' in value:
-            return f"{value.get('amount')} {value.get('unit', '')}".strip()
+    # Plain strings and numbers are the most common values.
+    if not isinstance(value, dict):
+        return str(value)
+
+    if 'values' in value:
+        return ", ".join(
+            stringify(v.get('value', {})) for v in value['values']
+        )
+    if 'value' in value:
+        return stringify(value['value'])
+    if 'string' in value:
+        return value['string']
+    if 'QID' in value:
+        return f"{value.get('label')} ({value.get('QID')})"
+    if 'PID' in value:
+        return f"{value.get('label')} ({value.get('PID')})"
+    if 'amount' in value:
+        return f"{value.get('amount')} {value.get('unit', '')}".strip()
     return str(value)
 
 def triplet_values_to_string(entity_id: str,
-                             property_id: str,
+                             property_id: str | None,
                              entity: dict) -> str:
     """
     Converts triplet values of a Wikidata statement into a human-readable string format.
 
     Args:
         entity_id (str): The Wikidata entity ID (QID).
-        property_id (str): The Wikidata property ID (PID).
+        property_id (str | None): The Wikidata property ID (PID) shown for claims without their own PID, None when several properties were requested.
         entity (dict): The triplet data of the entity.
 
     Returns:
@@ -482,37 +823,43 @@ def triplet_values_to_string(entity_id: str,
     """
     claims = entity.get("claims")
     if not claims:
-        return None
+        return ""
 
-    output = ""
+    parts: list[str] = []
+    # Local bindings avoid repeated global/attribute lookups in the loops.
+    append = parts.append
+    to_string = stringify
     for claim in claims:
         for claim_value in claim.get("values", []):
-            if output:
-                output += "\n"
-
-            output += f"{entity['label']} ({entity_id}): "
-            claim_pid = claim.get("PID", property_id)
-            output += f"{claim['property_label']} ({claim_pid}): "
-            output += f"{stringify(claim_value['value'])}\n"
-
-            output += f"  Rank: {claim_value.get('rank', 'normal')}\n"
+            if parts:
+                append("\n")
+
+            claim_pid = claim.get("PID") or property_id
+            append(
+                f"{entity['label']} ({entity_id}): "
+                f"{claim['property_label']} ({claim_pid}): "
+                f"{to_string(claim_value['value'])}\n"
+                f"  Rank: {claim_value.get('rank', 'normal')}\n"
+            )
 
             qualifiers = claim_value.get("qualifiers", [])
             if qualifiers:
-                output += f"  Qualifier:\n"
+                append("  Qualifier:\n")
                 for qualifier in qualifiers:
-                    output += f"    - {qualifier['property_label']} ({qualifier['PID']}): "
-                    output += stringify(qualifier)
-                    output += "\n"
+                    append(
+                        f"    - {qualifier['property_label']} ({qualifier['PID']}): "
+                        f"{to_string(qualifier)}\n"
+                    )
 
             references = claim_value.get("references", [])
             if references:
                 i = 1
                 for reference in references:
-                    output += f"  Reference {i}:\n"
+                    append(f"  Reference {i}:\n")
                     for reference_claim in reference:
-                        output += f"    - {reference_claim['property_label']} ({reference_claim['PID']}): "
-                        output += stringify(reference_claim)
-                        output += "\n"
+                        append(
+                            f"    - {reference_claim['property_label']} ({reference_claim['PID']}): "
+                            f"{to_string(reference_claim)}\n"
+                        )
                     i += 1
-    return output.strip()
+    return "".join(parts).strip()